@@ -0,0 +1,52 @@
+"""On-disk cache of generated SQL queries."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import time
+
+CACHE_FILE = os.path.expanduser("~/.cache/datatalk/sql_cache.db")
+
+
+class SQLCache:
+    """SQLite-backed mapping of (model, schema, question) to generated SQL."""
+
+    def __init__(self, path: str | None = None):
+        self._memory: dict[bytes, str] = {}
+        path = path or CACHE_FILE
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.con = sqlite3.connect(path)
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS sql_cache "
+            "(key BLOB PRIMARY KEY, sql TEXT NOT NULL, ts INTEGER NOT NULL)"
+        )
+
+    @staticmethod
+    def _key(model: str, schema: str, question: str) -> bytes:
+        # Whitespace is normalized but case is kept, since it matters in SQL literals
+        question = " ".join(question.split())
+        return hashlib.blake2b(f"{model}|{schema}|{question}".encode(), digest_size=16).digest()
+
+    def get(self, model: str, schema: str, question: str) -> str | None:
+        """Return cached SQL for the question, or None."""
+        key = self._key(model, schema, question)
+        if key not in self._memory:
+            row = self.con.execute("SELECT sql FROM sql_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._memory[key] = row[0]
+        return self._memory[key]
+
+    def put(self, model: str, schema: str, question: str, sql: str) -> None:
+        """Store SQL generated for the question."""
+        key = self._key(model, schema, question)
+        if self._memory.get(key) == sql:
+            return
+        self._memory[key] = sql
+        with self.con:
+            self.con.execute(
+                "INSERT OR REPLACE INTO sql_cache VALUES (?, ?, ?)",
+                (key, sql, int(time.time())),
+            )
@@ -1,85 +1,302 @@
 """Database operations with DuckDB."""
 
+from __future__ import annotations
+
+import hashlib
+import os
+import weakref
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any
 
 import duckdb
 import pandas as pd
 
+CACHE_DIR = os.path.expanduser("~/.cache/datatalk")
+SAMPLE_SCAN_ROWS = 10_000
+SAMPLE_CHARS = 20
+RESULT_CACHE_SIZE = 128
+CACHE_DATABASE = "cache"
+SOURCE_TABLE = "source_file"
+
+# Memoized query results per connection, dropped along with the connection
+_results: weakref.WeakKeyDictionary[
+    duckdb.DuckDBPyConnection, OrderedDict[tuple[str, int | None], pd.DataFrame]
+] = weakref.WeakKeyDictionary()
+
+
+def create_connection(
+    path: str | None = None, threads: int | None = None
+) -> duckdb.DuckDBPyConnection:
+    """Create and return a DuckDB connection.
+
+    If path is a supported data file, a database file in CACHE_DIR is attached so that
+    later runs on the same file can reuse the loaded table.
+    If threads is given, it overrides DuckDB's default of one thread per core.
+    The object cache is enabled so Parquet metadata is read once per session.
+    """
+    con = _connect(path)
+    con.execute("SET enable_object_cache = true")
+    if threads is not None:
+        con.execute(f"SET threads = {int(threads)}")
+    return con
+
+
+def _connect(path: str | None) -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect()
+    if path is None or not os.path.isfile(path) or Path(path).suffix.lower() not in LOADERS:
+        return con
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # An existing cache is attached read-only, so other instances can share it;
+        # load_data reopens it for writing only if it is out of date
+        _attach_cache(con, path, read_only=os.path.exists(_cache_path(path)))
+    except (OSError, duckdb.Error):
+        # The cache is unwritable or being written by another running instance
+        pass
+    return con
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _cache_path(path: str) -> str:
+    key = hashlib.blake2b(os.path.abspath(path).encode(), digest_size=16).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.duckdb")
+
+
+def _attach_cache(con: duckdb.DuckDBPyConnection, path: str, read_only: bool = False) -> None:
+    options = " (READ_ONLY)" if read_only else ""
+    con.execute(f"ATTACH {_literal(_cache_path(path))} AS {CACHE_DATABASE}{options}")
+    con.execute(f"USE {CACHE_DATABASE}")
+
+
+def _uses_cache(con: duckdb.DuckDBPyConnection) -> bool:
+    result = con.execute("SELECT current_database()").fetchone()
+    return result is not None and result[0] == CACHE_DATABASE
+
+
+def _reattach(con: duckdb.DuckDBPyConnection, path: str, read_only: bool) -> bool:
+    """Reopen the cache database in the given mode; on failure, use the in-memory one."""
+    con.execute("USE memory")
+    con.execute(f"DETACH {CACHE_DATABASE}")
+    try:
+        _attach_cache(con, path, read_only)
+    except duckdb.Error:
+        return False
+    return True
+
+
+def _source_signature(path: str) -> tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _is_loaded(con: duckdb.DuckDBPyConnection, path: str) -> bool:
+    """Check whether 'events' holds a copy of the file as it is now.
+
+    Size and modification time are compared for equality, so a file replaced by
+    an older copy is reloaded too.
+    """
+    tables = {
+        row[0]
+        for row in con.execute(
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE table_catalog = current_database()"
+        ).fetchall()
+    }
+    if not {"events", SOURCE_TABLE} <= tables:
+        return False
+    recorded = con.execute(f"SELECT size, mtime_ns FROM {SOURCE_TABLE}").fetchone()
+    return recorded == _source_signature(path)
+
+
+def _record_source(con: duckdb.DuckDBPyConnection, path: str) -> None:
+    con.execute(f"CREATE OR REPLACE TABLE {SOURCE_TABLE} (size BIGINT, mtime_ns BIGINT)")
+    con.execute(f"INSERT INTO {SOURCE_TABLE} VALUES (?, ?)", list(_source_signature(path)))
+
+
+def _drop_events(con: duckdb.DuckDBPyConnection) -> None:
+    """Drop 'events', which is a view for Parquet files and a table otherwise."""
+    result = con.execute(
+        "SELECT table_type FROM information_schema.tables "
+        "WHERE table_catalog = current_database() AND table_name = 'events'"
+    ).fetchone()
+    if result is not None:
+        con.execute("DROP VIEW events" if result[0] == "VIEW" else "DROP TABLE events")
 
-def create_connection() -> duckdb.DuckDBPyConnection:
-    """Create and return a DuckDB connection."""
-    return duckdb.connect()
+
+def _load_csv(con: duckdb.DuckDBPyConnection, path: str) -> None:
+    con.execute(
+        "CREATE TABLE events AS SELECT * FROM read_csv_auto(?, HEADER=TRUE, PARALLEL=TRUE)",
+        [path],
+    )
+
+
+def _load_parquet(con: duckdb.DuckDBPyConnection, path: str) -> None:
+    # A view avoids copying the file and lets filters and projections reach the reader.
+    # Views cannot take parameters, so the path is inlined as a quoted literal.
+    con.execute(f"CREATE VIEW events AS SELECT * FROM read_parquet({_literal(os.path.abspath(path))})")
+
+
+def _load_excel(con: duckdb.DuckDBPyConnection, path: str) -> None:
+    df = pd.read_excel(path)
+    con.execute("CREATE TABLE events AS SELECT * FROM df")
+
+
+LOADERS = {
+    ".csv": _load_csv,
+    ".parquet": _load_parquet,
+    ".xlsx": _load_excel,
+    ".xls": _load_excel,
+}
 
 
 def load_data(con: duckdb.DuckDBPyConnection, path: str) -> None:
-    """Load CSV, Parquet, or Excel file into DuckDB and create a table named 'events'."""
-    file_path = Path(path)
-    file_extension = file_path.suffix.lower()
-
-    con.execute("DROP TABLE IF EXISTS events;")
-
-    if file_extension == ".parquet":
-        con.execute(f"CREATE TABLE events AS SELECT * FROM read_parquet('{path}');")
-    elif file_extension == ".csv":
-        con.execute(
-            f"CREATE TABLE events AS SELECT * FROM "
-            f"read_csv_auto('{path}', HEADER=TRUE);"
-        )
-    elif file_extension in [".xlsx", ".xls"]:
-        df = pd.read_excel(path)
-        con.execute("CREATE TABLE events AS SELECT * FROM df")
-    else:
+    """Load CSV, Parquet, or Excel file into DuckDB and create a table named 'events'.
+
+    A cached copy is reopened read-only afterwards, so generated SQL cannot modify it.
+    """
+    file_extension = Path(path).suffix.lower()
+    loader = LOADERS.get(file_extension)
+    if loader is None:
         raise ValueError(
             f"Unsupported file format: {file_extension}. "
-            f"Supported formats: .csv, .parquet, .xlsx, .xls"
+            f"Supported formats: {', '.join(LOADERS)}"
         )
 
+    cached = _uses_cache(con)
+    if cached and _is_loaded(con, path):
+        return
+
+    if cached:
+        cached = _reattach(con, path, read_only=False)
+    _drop_events(con)
+    loader(con, path)
+    if cached:
+        _record_source(con, path)
+        con.execute("CHECKPOINT")
+        if not _reattach(con, path, read_only=True):
+            # The file was taken by another instance in between; keep a session copy
+            loader(con, path)
+
 
-def get_schema(con: duckdb.DuckDBPyConnection) -> str:
+def get_columns(con: duckdb.DuckDBPyConnection) -> list[tuple[str, str]]:
+    """Return (name, type) pairs for the columns of the 'events' table."""
+    return [(row[1], row[2]) for row in con.execute("PRAGMA table_info('events')").fetchall()]
+
+
+def get_schema(
+    con: duckdb.DuckDBPyConnection, columns: list[tuple[str, str]] | None = None
+) -> str:
     """Return a simple schema description for the 'events' table."""
-    rows = con.execute("PRAGMA table_info('events')").fetchall()
-    schema_lines = []
-    for row in rows:
-        _, name, col_type, *_ = row
-        schema_lines.append(f"{name} ({col_type})")
-    return ", ".join(schema_lines)
+    if columns is None:
+        columns = get_columns(con)
+    return ", ".join(f"{name} ({col_type})" for name, col_type in columns)
+
 
+def is_read_only(con: duckdb.DuckDBPyConnection, sql: str) -> bool:
+    """Check whether sql is a single query rather than statements that may write."""
+    try:
+        statements = con.extract_statements(sql)
+    except duckdb.Error:
+        return False
+    return len(statements) == 1 and statements[0].type == duckdb.StatementType.SELECT
 
-def execute_query(con: duckdb.DuckDBPyConnection, sql: str) -> pd.DataFrame:
-    """Execute SQL query and return results as DataFrame."""
-    return con.execute(sql).df()
 
+def execute_query(
+    con: duckdb.DuckDBPyConnection,
+    sql: str,
+    limit: int | None = None,
+    memoize: bool = False,
+) -> pd.DataFrame:
+    """Execute SQL query and return results as DataFrame.
 
-def get_stats(con: duckdb.DuckDBPyConnection) -> dict[str, Any]:
+    If limit is given, only the first limit rows are fetched. A single query gets a
+    LIMIT on top so that DuckDB can stop early; results of other statements are fetched
+    chunk by chunk instead of being materialized in full.
+    If memoize is True, results of read-only queries are reused when the same query
+    runs again on the same connection, until a statement that may change the data runs.
+    """
+    if not memoize:
+        return _execute(con, sql, limit)
+
+    results = _results.setdefault(con, OrderedDict())
+    if not is_read_only(con, sql):
+        # The statement may change the data that earlier results came from
+        results.clear()
+        return _execute(con, sql, limit)
+
+    key = (sql, limit)
+    if key in results:
+        results.move_to_end(key)
+        return results[key]
+    df = results[key] = _execute(con, sql, limit)
+    if len(results) > RESULT_CACHE_SIZE:
+        results.popitem(last=False)
+    return df
+
+
+def _execute(
+    con: duckdb.DuckDBPyConnection, sql: str, limit: int | None
+) -> pd.DataFrame:
+    if limit is None:
+        return con.execute(sql).df()
+
+    if is_read_only(con, sql):
+        # LIMIT goes on top of the parsed query, so terminators and comments need no editing
+        return con.sql(sql).limit(limit).df()
+
+    # A chunk can be partly filled, e.g. after a selective filter, so keep
+    # fetching until there are enough rows or the result is exhausted
+    result = con.execute(sql)
+    df = result.fetch_df_chunk()
+    while len(df) < limit:
+        chunk = result.fetch_df_chunk()
+        if chunk.empty:
+            break
+        df = pd.concat([df, chunk], ignore_index=True)
+    return df.head(limit)
+
+
+def get_stats(
+    con: duckdb.DuckDBPyConnection, columns: list[tuple[str, str]] | None = None
+) -> dict[str, Any]:
     """Get dataset statistics (row count, column information)."""
     # Get row count
     result = con.execute("SELECT COUNT(*) FROM events").fetchone()
     row_count = result[0] if result else 0
 
-    # Get column info
-    columns = con.execute("PRAGMA table_info('events')").fetchall()
+    if columns is None:
+        columns = get_columns(con)
     col_count = len(columns)
+    names = [name for name, _ in columns]
+
+    # Get sample values for all columns at once, scanning the whole table
+    # only for columns that have no values near the top
+    try:
+        samples = _sample_values(con, names, f"(SELECT * FROM events LIMIT {SAMPLE_SCAN_ROWS})")
+        missing = [i for i, values in enumerate(samples) if not values]
+        if missing and row_count > SAMPLE_SCAN_ROWS:
+            rescanned = _sample_values(con, [names[i] for i in missing], "events")
+            for i, values in zip(missing, rescanned):
+                samples[i] = values
+    except Exception:
+        samples = None
 
-    # Get sample values for each column
     column_details = []
-    for row in columns:
-        _, name, col_type, *_ = row
-        try:
-            query = (
-                f"SELECT DISTINCT {name} FROM events "
-                f"WHERE {name} IS NOT NULL LIMIT 3"
-            )
-            samples = con.execute(query).fetchall()
+    for i, (name, col_type) in enumerate(columns):
+        if samples is None:
+            sample_str = "[error reading]"
+        else:
             sample_values = []
-            for sample in samples:
-                value_str = str(sample[0])
-                if len(value_str) > 20:
-                    value_str = value_str[:20] + "..."
+            for value_str in samples[i] or []:
+                if len(value_str) > SAMPLE_CHARS:
+                    value_str = value_str[:SAMPLE_CHARS] + "..."
                 sample_values.append(value_str)
             sample_str = ", ".join(sample_values) if sample_values else "[no data]"
-        except Exception:
-            sample_str = "[error reading]"
 
         column_details.append({
             "name": name,
@@ -93,3 +310,19 @@ def get_stats(con: duckdb.DuckDBPyConnection) -> dict[str, Any]:
         "columns": column_details,
     }
 
+
+def _sample_values(
+    con: duckdb.DuckDBPyConnection, names: list[str], source: str
+) -> list[list[str] | None]:
+    """Return up to three distinct non-null values per column in one query.
+
+    Values are returned as strings cut to one character past SAMPLE_CHARS, so long
+    text never leaves DuckDB but truncation can still be detected.
+    """
+    exprs = []
+    for name in names:
+        column = '"' + name.replace('"', '""') + '"'
+        value = f"substr(CAST({column} AS VARCHAR), 1, {SAMPLE_CHARS + 1})"
+        exprs.append(f"list(DISTINCT {value}) FILTER (WHERE {column} IS NOT NULL)[1:3]")
+    result = con.execute(f"SELECT {', '.join(exprs)} FROM {source}").fetchone()
+    return list(result) if result else [None] * len(names)
@@ -1,64 +1,151 @@
 """LLM provider using LiteLLM for unified API access."""
 
+from __future__ import annotations
+
+import atexit
 import os
 import re
+
+import httpx
 import litellm
 
 # Suppress litellm debug messages
 litellm.suppress_debug_info = True
 
+REQUEST_TIMEOUT = 30.0
+# Local models can take minutes to load before the first token
+LOCAL_REQUEST_TIMEOUT = 600.0
+MAX_RETRIES = 2
+OLLAMA_API_BASE = "http://127.0.0.1:11434"
+# Unfenced content that is SQL from the start
+SQL_START_PATTERN = re.compile(r"\s*(select|with)\b", re.IGNORECASE)
+# First fenced block, with an optional language tag line; an unclosed fence runs to the end
+FENCE_PATTERN = re.compile(r"```(?:[\w+-]*[ \t]*\r?\n)?(.*?)(?:```|\Z)", re.DOTALL)
+# Technical prefixes stripped from litellm errors, in order
+ERROR_PREFIX_PATTERNS = [
+    re.compile(r"litellm\.\w+Error:\s*", re.IGNORECASE),  # litellm.AuthenticationError:, litellm.RateLimitError:, etc.
+    re.compile(r"\w+Error:\s*", re.IGNORECASE),  # AuthenticationError:, RateLimitError:, APIError:, etc.
+    re.compile(r"\w+Exception\s*-\s*", re.IGNORECASE),  # OpenAIException -, AnthropicException -, etc.
+]
 
-class LiteLLMProvider:
-    """Unified LLM provider supporting 100+ models via LiteLLM."""
-    
-    def __init__(self, model: str):
-        self.model = model
-    
-    def to_sql(self, question: str, schema: str) -> str:
-        """Convert natural language to SQL using any LLM via LiteLLM."""
-        prompt = f"""You are a SQL query generator. Convert the user's question into a valid DuckDB SQL query.
+# Constant across questions so providers can cache the prompt prefix
+SYSTEM_PROMPT = """You are a SQL query generator. Convert the user's question into a valid DuckDB SQL query.
 
 Table name: events
-Schema: {schema}
+The table schema is given before the question.
 
 CRITICAL RULES:
 - Wrap the SQL query in markdown code blocks (```sql ... ```)
 - No explanations, no apologies, no refusals
 - If the question doesn't make sense, generate a simple SELECT * FROM events LIMIT 1
-- Query must reference the 'events' table
+- Query must reference the 'events' table"""
 
-User question: {question}
 
-SQL query:"""
-        
+class LiteLLMProvider:
+    """Unified LLM provider supporting 100+ models via LiteLLM."""
+    
+    def __init__(self, model: str):
+        self.model = model
+        # Local models: talk to the loopback address directly, skipping localhost resolution
+        self._api_base = None
+        timeout = REQUEST_TIMEOUT
+        if model.startswith(("ollama/", "ollama_chat/")):
+            self._api_base = os.getenv("OLLAMA_API_BASE", OLLAMA_API_BASE)
+            timeout = LOCAL_REQUEST_TIMEOUT
+        self._timeout = float(os.getenv("MODEL_TIMEOUT", timeout))
+        # One pooled client, shared by all providers, keeps connections (and TLS
+        # sessions) alive across questions
+        if litellm.client_session is None:
+            litellm.client_session = httpx.Client(
+                timeout=self._timeout,
+                limits=httpx.Limits(max_keepalive_connections=4),
+            )
+            atexit.register(litellm.client_session.close)
+    
+    def to_sql(self, question: str, schema: str) -> str:
+        """Convert natural language to SQL using any LLM via LiteLLM."""
         try:
             response = litellm.completion(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                api_base=self._api_base,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    # Schema first: it is stable within a session and extends the cached prefix
+                    {"role": "user", "content": f"Schema: {schema}\n\nQuestion: {question}"},
+                ],
                 temperature=float(os.getenv("MODEL_TEMPERATURE", "0.1")),
                 max_tokens=500,
+                timeout=self._timeout,
+                num_retries=MAX_RETRIES,
+                stream=True,
             )
+            content = self._read_stream(response)
         except Exception as e:
             # Clean up litellm error messages for user-friendly display
             cleaned_message = self._clean_litellm_error(str(e))
             raise ValueError(cleaned_message) from None
         
-        content = response.choices[0].message.content
-        if content is None:
+        if not content:
             raise ValueError(f"No content returned from {self.model}")
         
         return self._clean_sql(content)
     
+    def _read_stream(self, response) -> str:
+        """Collect streamed content, stopping as soon as the statement is complete."""
+        content = ""
+        for chunk in response:
+            content += chunk.choices[0].delta.content or ""
+            end = self._statement_end(content)
+            if end is not None:
+                # LiteLLM has no sync close; closing the provider stream stops generation
+                close = getattr(getattr(response, "completion_stream", None), "close", None)
+                if close is not None:
+                    close()
+                return content[:end]
+        return content
+    
+    def _statement_end(self, content: str) -> int | None:
+        """Return where the first complete statement in content ends, or None.
+
+        A statement ends at a closing code fence, or at a semicolon outside quotes and
+        -- comments. Semicolons only count inside a fence or after a leading SELECT/WITH,
+        so prose before the query cannot end it.
+        """
+        fence = content.find("```")
+        if fence != -1:
+            close = content.find("```", fence + 3)
+            if close != -1:
+                return close + 3
+            start = content.find("\n", fence)
+            if start == -1:
+                return None
+        elif SQL_START_PATTERN.match(content):
+            start = 0
+        else:
+            return None
+
+        quote = None
+        i = start
+        while i < len(content):
+            char = content[i]
+            if quote is not None:
+                if char == quote:
+                    quote = None
+            elif char in "'\"":
+                quote = char
+            elif content.startswith("--", i):
+                i = content.find("\n", i)
+                if i == -1:
+                    return None
+            elif char == ";":
+                return i + 1
+            i += 1
+        return None
+    
     def _clean_sql(self, sql: str) -> str:
         """Extract SQL from markdown code blocks."""
-        if "```" in sql:
-            parts = sql.split("```")
-            if len(parts) >= 2:
-                block = parts[1]
-                # Skip language tag (first line) if present
-                lines = block.strip().split("\n", 1)
-                return lines[-1].strip() if len(lines) > 1 else lines[0].strip()
-        return sql.strip()
+        match = FENCE_PATTERN.search(sql)
+        return (match.group(1) if match else sql).strip()
     
     def _clean_litellm_error(self, error_message: str) -> str:
         """Clean up litellm error message for user-friendly display."""
@@ -69,14 +156,8 @@ SQL query:"""
         cleaned = error_message
         
         # Remove common technical prefixes
-        prefixes_to_remove = [
-            r"litellm\.\w+Error:\s*",  # litellm.AuthenticationError:, litellm.RateLimitError:, etc.
-            r"\w+Error:\s*",  # AuthenticationError:, RateLimitError:, APIError:, etc.
-            r"\w+Exception\s*-\s*",  # OpenAIException -, AnthropicException -, etc.
-        ]
-        
-        for prefix in prefixes_to_remove:
-            cleaned = re.sub(prefix, "", cleaned, flags=re.IGNORECASE)
+        for pattern in ERROR_PREFIX_PATTERNS:
+            cleaned = pattern.sub("", cleaned)
         
         cleaned = cleaned.strip()
         
@@ -1,47 +1,45 @@
 """DataTalk CLI - Natural language interface for data files."""
 
+from __future__ import annotations
+
 import atexit
+import cProfile
 import os
 import sys
 import json
 import argparse
 import readline
+import sqlite3
 import termios
+from collections.abc import Iterator
+from contextlib import contextmanager
 from importlib.metadata import version, PackageNotFoundError
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import duckdb
-import pandas as pd
-from dotenv import load_dotenv
 from rich.console import Console
 from rich.syntax import Syntax
 
-from datatalk import database, query
-from datatalk.llm import LiteLLMProvider
+from datatalk.cache import SQLCache
 from datatalk.printer import (
+    RESULT_LIMIT,
     Printer,
     print_logo,
     print_configuration_help,
+    print_error,
     print_file_required_help,
     print_stats,
     print_query_results,
 )
 
-HISTORY_FILE = os.path.expanduser("~/.datatalk_history")
-EXIT_COMMANDS = {"quit", "exit", "q", "stop", "bye", "goodbye"}
+if TYPE_CHECKING:
+    import duckdb
+    import pandas as pd
 
+    from datatalk.llm import LiteLLMProvider
 
-class ArgumentParserWithShortErrors(argparse.ArgumentParser):
-    """ArgumentParser that shows 'error: message' instead of 'prog: error: message'."""
-    
-    def error(self, message):
-        self.print_usage(sys.stderr)
-        self.exit(2, f"error: {message}\n")
-
-
-def create_argument_parser() -> argparse.ArgumentParser:
-    """Create and configure the CLI argument parser."""
-    epilog_text = """
+HISTORY_FILE = os.path.expanduser("~/.datatalk_history")
+PROFILE_FILE = os.path.expanduser("~/.cache/datatalk/profile.prof")
+EPILOG = """
 examples:
   # Interactive mode
   dtalk data.csv
@@ -55,12 +53,25 @@ examples:
   dtalk data.csv --no-schema                         # Hide schema table
   dtalk data.csv -p 'query' --no-sql                 # Hide SQL
   dtalk data.csv -p 'query' --sql-only               # Only SQL
+  dtalk data.csv -p 'query' --profile                # Profile (view with snakeviz)
 """
+EXIT_COMMANDS = frozenset({"quit", "exit", "q", "stop", "bye", "goodbye"})
 
+
+class ArgumentParserWithShortErrors(argparse.ArgumentParser):
+    """ArgumentParser that shows 'error: message' instead of 'prog: error: message'."""
+    
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        self.exit(2, f"error: {message}\n")
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    """Create and configure the CLI argument parser."""
     parser = ArgumentParserWithShortErrors(
         prog="dtalk",
         description="",
-        epilog=epilog_text,
+        epilog=EPILOG,
         add_help=True,
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
@@ -74,6 +85,9 @@ examples:
     parser.add_argument("--no-sql", action="store_true", help="Hide generated SQL queries")
     parser.add_argument("--no-schema", action="store_true", help="Don't show column details table")
     parser.add_argument("--sql-only", action="store_true", help="Show only SQL query without executing")
+    parser.add_argument("--no-cache", action="store_true", help="Always ask the LLM and run the query instead of reusing cached SQL and results")
+    parser.add_argument("--threads", type=int, help="Number of DuckDB threads (default: all cores)")
+    parser.add_argument("--profile", action="store_true", help=f"Save a cProfile report to {PROFILE_FILE}")
 
     return parser
 
@@ -90,6 +104,10 @@ def validate_args(parser: argparse.ArgumentParser, args: argparse.Namespace, pri
 
 def setup_environment(args: argparse.Namespace, printer: Printer) -> LiteLLMProvider:
     """Load config and create LLM provider."""
+    from dotenv import load_dotenv
+
+    from datatalk.llm import LiteLLMProvider
+
     load_dotenv()
 
     model = os.getenv("LLM_MODEL")
@@ -109,14 +127,18 @@ def setup_environment(args: argparse.Namespace, printer: Printer) -> LiteLLMProv
 
 def load_data(args: argparse.Namespace, printer: Printer) -> tuple[duckdb.DuckDBPyConnection, str]:
     """Load data file and return database connection with schema."""
-    con = database.create_connection()
-    database.load_data(con, args.file)
-    schema_info = database.get_schema(con)
+    from datatalk import database
 
-    printer.decorative("\n[green]Data loaded successfully![/green]", highlight=False)
-    
-    stats = database.get_stats(con)
-    print_stats(stats, printer, not args.no_schema)
+    con = database.create_connection(args.file, args.threads)
+    database.load_data(con, args.file)
+    columns = database.get_columns(con)
+    schema_info = database.get_schema(con, columns)
+
+    # Statistics are only displayed, so skip collecting them when output is quiet
+    if not printer.quiet:
+        printer.decorative("\n[green]Data loaded successfully![/green]", highlight=False)
+        stats = database.get_stats(con, columns)
+        print_stats(stats, printer, not args.no_schema)
     
     return con, schema_info
 
@@ -128,7 +150,23 @@ def output_json(result: dict[str, Any]) -> None:
         "data": result["dataframe"].to_dict(orient="records") if result["dataframe"] is not None else None,
         "error": result["error"],
     }
-    print(json.dumps(output, indent=2, default=str))
+    try:
+        import orjson
+    except ImportError:
+        print(json.dumps(output, indent=2, default=str))
+        return
+    # Datetimes go through default=str so they look the same as with json
+    options = (
+        orjson.OPT_INDENT_2
+        | orjson.OPT_APPEND_NEWLINE
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_SERIALIZE_NUMPY
+    )
+    # orjson produces UTF-8 bytes, so skip decoding and re-encoding through the text layer
+    sys.stdout.flush()
+    sys.stdout.buffer.write(orjson.dumps(output, default=str, option=options))
+    sys.stdout.buffer.flush()
 
 
 def output_csv(df: pd.DataFrame) -> None:
@@ -154,9 +192,15 @@ def run_single_query(
     schema_info: str,
     con: duckdb.DuckDBPyConnection,
     printer: Printer,
+    cache: SQLCache | None,
 ) -> None:
     """Execute a single query in non-interactive mode."""
-    result = query.process_query(provider, args.prompt, schema_info, con, printer)
+    from datatalk import query
+
+    limit = None if args.json or args.csv else RESULT_LIMIT + 1
+    result = query.process_query(
+        provider, args.prompt, schema_info, con, printer, limit, cache
+    )
     
     if result["error"]:
         if args.json:
@@ -164,7 +208,7 @@ def run_single_query(
         elif args.csv:
             sys.stderr.write(f"Error: {result['error']}\n")
         else:
-            printer.result(f"\n[red]Error:[/red] {result['error']}\n", highlight=False)
+            print_error(printer, result["error"])
         sys.exit(1)
     
     if args.json:
@@ -209,8 +253,11 @@ def run_interactive_mode(
     schema_info: str,
     con: duckdb.DuckDBPyConnection,
     printer: Printer,
+    cache: SQLCache | None,
 ) -> None:
     """Run the interactive question-answer loop."""
+    from datatalk import query
+
     setup_history()
     
     printer.result(
@@ -226,24 +273,52 @@ def run_interactive_mode(
             printer.result("\n[dim]Goodbye![/dim]\n", highlight=False)
             break
 
+        question = question.strip()
+        if not question:
+            continue
+
         if question.lower() in EXIT_COMMANDS:
             printer.result("[dim]Goodbye![/dim]\n", highlight=False)
             break
-        
-        if not question.strip():
-            continue
 
         old_settings = disable_input_echo()
-        result = query.process_query(provider, question, schema_info, con, printer)
+        result = query.process_query(
+            provider, question, schema_info, con, printer, RESULT_LIMIT + 1, cache
+        )
         restore_input_echo(old_settings)
         
         if result["error"]:
-            printer.result(f"\n[red]Error:[/red] {result['error']}\n", highlight=False)
+            print_error(printer, result["error"])
             continue
         
         print_result(result, args, printer)
 
 
+def open_cache() -> SQLCache | None:
+    """Open the SQL cache, or return None if it cannot be used."""
+    try:
+        return SQLCache()
+    except (OSError, sqlite3.Error):
+        return None
+
+
+@contextmanager
+def profiling(enabled: bool) -> Iterator[None]:
+    """Profile the enclosed block and save stats to PROFILE_FILE on any exit."""
+    if not enabled:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(PROFILE_FILE), exist_ok=True)
+        profiler.dump_stats(PROFILE_FILE)
+
+
 def main():
     """Main CLI entry point."""
     console = Console()
@@ -256,13 +331,16 @@ def main():
         print_logo(printer)
         
         validate_args(parser, args, printer)
-        provider = setup_environment(args, printer)
-        con, schema_info = load_data(args, printer)
 
-        if args.prompt:
-            run_single_query(args, provider, schema_info, con, printer)
-        else:
-            run_interactive_mode(args, provider, schema_info, con, printer)
+        with profiling(args.profile):
+            provider = setup_environment(args, printer)
+            con, schema_info = load_data(args, printer)
+            cache = None if args.no_cache else open_cache()
+
+            if args.prompt:
+                run_single_query(args, provider, schema_info, con, printer, cache)
+            else:
+                run_interactive_mode(args, provider, schema_info, con, printer, cache)
 
     except KeyboardInterrupt:
         console.print("\n[dim]Goodbye![/dim]\n", highlight=False)
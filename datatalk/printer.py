@@ -1,11 +1,19 @@
 """Console output wrapper with quiet mode support."""
 
-from typing import Any
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING, Any
 
-import pandas as pd
 from rich import box
-from rich.console import Console
+from rich.console import Console, Group
 from rich.table import Table
+from rich.text import Text
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RESULT_LIMIT = 20
 
 
 class Printer:
@@ -25,9 +33,7 @@ class Printer:
         self.console.print(*args, **kwargs)
 
 
-def print_logo(printer: Printer) -> None:
-    """Print the DataTalk ASCII logo."""
-    logo = """
+LOGO = Text.from_markup("""
 [bold cyan]
 ██████╗  █████╗ ████████╗ █████╗ ████████╗ █████╗ ██╗     ██╗  ██╗
 ██╔══██╗██╔══██╗╚══██╔══╝██╔══██╗╚══██╔══╝██╔══██╗██║     ██║ ██╔╝
@@ -37,36 +43,59 @@ def print_logo(printer: Printer) -> None:
 ╚═════╝ ╚═╝  ╚═╝   ╚═╝   ╚═╝  ╚═╝   ╚═╝   ╚═╝  ╚═╝╚══════╝╚═╝  ╚═╝
 [/bold cyan]
 [dim]Ask questions about your CSV, Excel or Parquet data in natural language.[/dim]
-"""
-    printer.decorative(logo, highlight=False)
+""")
+
+CONFIGURATION_HELP = Group(*(Text.from_markup(line) for line in (
+    "[yellow]⚠️  Please configure your LLM model first[/yellow]\n",
+    "[bold]Quick setup:[/bold]",
+    "  [cyan]export LLM_MODEL=gpt-4o[/cyan]",
+    "  [cyan]export OPENAI_API_KEY=your-key[/cyan]\n",
+    "[bold]Popular models:[/bold]",
+    "  [green]•[/green] gpt-4o, gpt-4o-mini, gpt-3.5-turbo [dim](OpenAI)[/dim]",
+    "  [green]•[/green] azure/gpt-4o [dim](Azure OpenAI)[/dim]",
+    "  [green]•[/green] claude-3-5-sonnet-20241022 [dim](Anthropic)[/dim]",
+    "  [green]•[/green] gemini-1.5-flash, gemini-1.5-pro [dim](Google)[/dim]",
+    "  [green]•[/green] ollama/llama3.1, ollama/mistral [dim](Ollama - local)[/dim]\n",
+    "📚 Full guide: [blue]https://github.com/vtsaplin/datatalk-cli#configuration[/blue]",
+)))
+
+FILE_REQUIRED_HELP = Group(*(Text.from_markup(line) for line in (
+    "\n[yellow]📄 Please specify a data file to analyze[/yellow]\n",
+    "[bold]Usage:[/bold]",
+    "  [cyan]dtalk[/cyan] [green]<file>[/green] [dim][question][/dim]\n",
+    "[bold]Examples:[/bold]",
+    "  [cyan]dtalk[/cyan] [green]data.csv[/green]",
+    "  [cyan]dtalk[/cyan] [green]report.xlsx[/green] [dim]-p 'What are the top 5 products?'[/dim]",
+    "  [cyan]dtalk[/cyan] [green]data.parquet[/green] [dim]-s[/dim]\n",
+    "[bold]Supported formats:[/bold] CSV, Excel (.xlsx, .xls), Parquet",
+    "",
+)))
+
+
+def print_logo(printer: Printer) -> None:
+    """Print the DataTalk ASCII logo."""
+    if printer.quiet:
+        return
+    if not printer.console.is_terminal:
+        # Nothing will see the colors, so skip the Rich render pipeline
+        printer.console.file.write(LOGO.plain + "\n")
+        return
+    printer.decorative(LOGO)
 
 
 def print_configuration_help(printer: Printer) -> None:
     """Print helpful configuration message when LLM_MODEL is not set."""
-    printer.result("[yellow]⚠️  Please configure your LLM model first[/yellow]\n", highlight=False)
-    printer.result("[bold]Quick setup:[/bold]", highlight=False)
-    printer.result("  [cyan]export LLM_MODEL=gpt-4o[/cyan]", highlight=False)
-    printer.result("  [cyan]export OPENAI_API_KEY=your-key[/cyan]\n", highlight=False)
-    printer.result("[bold]Popular models:[/bold]", highlight=False)
-    printer.result("  [green]•[/green] gpt-4o, gpt-4o-mini, gpt-3.5-turbo [dim](OpenAI)[/dim]", highlight=False)
-    printer.result("  [green]•[/green] azure/gpt-4o [dim](Azure OpenAI)[/dim]", highlight=False)
-    printer.result("  [green]•[/green] claude-3-5-sonnet-20241022 [dim](Anthropic)[/dim]", highlight=False)
-    printer.result("  [green]•[/green] gemini-1.5-flash, gemini-1.5-pro [dim](Google)[/dim]", highlight=False)
-    printer.result("  [green]•[/green] ollama/llama3.1, ollama/mistral [dim](Ollama - local)[/dim]\n", highlight=False)
-    printer.result("📚 Full guide: [blue]https://github.com/vtsaplin/datatalk-cli#configuration[/blue]", highlight=False)
+    printer.result(CONFIGURATION_HELP)
 
 
 def print_file_required_help(printer: Printer) -> None:
     """Print helpful message when no data file is specified."""
-    printer.result("\n[yellow]📄 Please specify a data file to analyze[/yellow]\n", highlight=False)
-    printer.result("[bold]Usage:[/bold]", highlight=False)
-    printer.result("  [cyan]dtalk[/cyan] [green]<file>[/green] [dim][question][/dim]\n", highlight=False)
-    printer.result("[bold]Examples:[/bold]", highlight=False)
-    printer.result("  [cyan]dtalk[/cyan] [green]data.csv[/green]", highlight=False)
-    printer.result("  [cyan]dtalk[/cyan] [green]report.xlsx[/green] [dim]-p 'What are the top 5 products?'[/dim]", highlight=False)
-    printer.result("  [cyan]dtalk[/cyan] [green]data.parquet[/green] [dim]-s[/dim]\n", highlight=False)
-    printer.result("[bold]Supported formats:[/bold] CSV, Excel (.xlsx, .xls), Parquet", highlight=False)
-    printer.result()
+    printer.result(FILE_REQUIRED_HELP)
+
+
+def print_error(printer: Printer, message: str) -> None:
+    """Print an error message; the message itself is not parsed as markup."""
+    printer.result(Text.assemble("\n", ("Error:", "red"), f" {message}\n"))
 
 
 def print_stats(stats: dict[str, Any], printer: Printer, show_schema: bool = True) -> None:
@@ -92,17 +121,37 @@ def print_stats(stats: dict[str, Any], printer: Printer, show_schema: bool = Tru
         for col in columns:
             table.add_row(col["name"], col["type"], col["samples"])
 
-        printer.decorative(table)
+        printer.decorative(table, markup=False, highlight=False)
 
     printer.decorative()
 
 
-def print_query_results(df: pd.DataFrame, printer: Printer, limit: int = 20) -> None:
-    """Render query results as a table."""
-    if len(df) == 0:
+def print_query_results(df: pd.DataFrame, printer: Printer, limit: int = RESULT_LIMIT) -> None:
+    """Render query results as a table, or as TSV when --prompt output is piped."""
+    row_count = df.shape[0]
+    if row_count == 0:
         printer.result("[yellow]No results found.[/yellow]", highlight=False)
         return
 
+    if printer.quiet and not printer.console.is_terminal:
+        # Piped --prompt output is read by other tools, so skip the table layout
+        # and keep the footer out of the data
+        df.head(limit).to_csv(printer.console.file, sep="\t", index=False)
+        if row_count > limit:
+            sys.stderr.write(f"Showing first {limit} rows\n")
+        return
+
+    _print_table(df, printer, limit)
+    if row_count > limit:
+        msg = f"[dim]Showing first {limit} rows[/dim]\n"
+        printer.result(msg, highlight=False)
+
+
+def _print_table(df: pd.DataFrame, printer: Printer, limit: int) -> None:
+    """Render the first limit rows of df as a Rich table."""
+    import numpy as np
+    import pandas as pd
+
     table = Table(
         show_header=True,
         header_style="bold magenta",
@@ -112,18 +161,15 @@ def print_query_results(df: pd.DataFrame, printer: Printer, limit: int = 20) ->
     for col in df.columns:
         table.add_column(col)
 
-    row_count = 0
-    for _, row in df.iterrows():
-        if row_count >= limit:
-            ellipsis = ["..." for _ in range(len(df.columns) - 1)]
-            table.add_row("...", *ellipsis)
-            break
-        table.add_row(*[str(val) for val in row])
-        row_count += 1
+    values = df.head(limit).to_numpy(dtype=object)
+    # Per element: LIST cells are arrays, which astype(str) cannot convert
+    cells = np.vectorize(str, otypes=[object])(values)
+    cells[pd.isna(values)] = ""
+    for row in cells:
+        table.add_row(*row)
 
-    printer.result(table)
-
-    if len(df) > limit:
-        msg = f"[dim]Showing first {limit} of {len(df)} rows[/dim]\n"
-        printer.result(msg, highlight=False)
+    if df.shape[0] > limit:
+        ellipsis = ["..." for _ in range(len(df.columns) - 1)]
+        table.add_row("...", *ellipsis)
 
+    printer.result(table, markup=False, highlight=False)
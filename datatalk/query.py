@@ -1,13 +1,18 @@
 """Core query processing logic."""
 
-from typing import Any
+from __future__ import annotations
 
-import duckdb
+from typing import TYPE_CHECKING, Any
 
 from datatalk import database
-from datatalk.llm import LiteLLMProvider
 from datatalk.printer import Printer
 
+if TYPE_CHECKING:
+    import duckdb
+
+    from datatalk.cache import SQLCache
+    from datatalk.llm import LiteLLMProvider
+
 
 def process_query(
     provider: LiteLLMProvider,
@@ -15,14 +20,25 @@ def process_query(
     schema: str,
     con: duckdb.DuckDBPyConnection,
     printer: Printer,
+    limit: int | None = None,
+    cache: SQLCache | None = None,
 ) -> dict[str, Any]:
-    """Process a natural language query and return results."""
+    """Process a natural language query and return results.
+
+    If limit is given, at most limit rows are fetched (for display only).
+    If cache is given, previously generated SQL is reused and queries that execute
+    successfully are stored for later; results of repeated queries are reused too.
+    """
     try:
         printer.decorative("[dim]Analyzing your question...[/dim]")
-        sql = provider.to_sql(question, schema)
+        sql = cache.get(provider.model, schema, question) if cache else None
+        if sql is None:
+            sql = provider.to_sql(question, schema)
 
         printer.decorative("[dim]Executing query...[/dim]")
-        df = database.execute_query(con, sql)
+        df = database.execute_query(con, sql, limit, memoize=cache is not None)
+        if cache and database.is_read_only(con, sql):
+            cache.put(provider.model, schema, question, sql)
 
         return {
             "sql": sql,
@@ -0,0 +1,126 @@
+"""Shared fixtures for DataTalk tests."""
+import io
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Use LiteLLM's bundled model cost map; the import-time fetch of the remote one
+# runs in a background thread and can deadlock with concurrent imports offline
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from datatalk import cache, database
+from datatalk import main as cli
+from datatalk.llm import LiteLLMProvider
+from datatalk.main import main
+
+FAKE_MODEL = "test/fake-model"
+FAKE_SQL = "SELECT COUNT(*) FROM events"
+
+
+@pytest.fixture(autouse=True, scope="session")
+def fake_llm(tmp_path_factory):
+    """Answer every question with fake_llm.sql and keep caches and history out of $HOME.
+
+    Generated SQL is cached per question, so tests that change fake_llm.sql must ask
+    questions no other test asks.
+    """
+    home = tmp_path_factory.mktemp("home")
+    llm = SimpleNamespace(sql=FAKE_SQL)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("LLM_MODEL", FAKE_MODEL)
+        mp.setattr(LiteLLMProvider, "to_sql", lambda self, question, schema: llm.sql)
+        mp.setattr(database, "CACHE_DIR", str(home / "cache"))
+        mp.setattr(cache, "CACHE_FILE", str(home / "cache" / "sql_cache.db"))
+        mp.setattr(cli, "HISTORY_FILE", str(home / "history"))
+        yield llm
+
+
+@pytest.fixture(autouse=True)
+def reset_fake_sql(fake_llm):
+    """Restore the default fake SQL after each test."""
+    yield
+    fake_llm.sql = FAKE_SQL
+
+
+@pytest.fixture(scope="session")
+def repo_root():
+    """Repository root, resolved once per session."""
+    return Path(__file__).parent.parent.resolve()
+
+
+@pytest.fixture(scope="session")
+def test_data_csv():
+    """Path to CSV test data file."""
+    return Path(__file__).parent / "test_data_e2e.csv"
+
+
+@pytest.fixture(scope="session")
+def test_data_parquet(test_data_csv, tmp_path_factory):
+    """Path to a Parquet copy of the CSV test data, written once per session."""
+    import duckdb
+
+    path = tmp_path_factory.mktemp("data") / "test_data_e2e.parquet"
+    duckdb.sql(f"COPY (SELECT * FROM read_csv_auto('{test_data_csv}')) TO '{path}' (FORMAT PARQUET)")
+    return path
+
+
+@pytest.fixture(scope="session")
+def test_data_excel(test_data_csv, tmp_path_factory):
+    """Path to an Excel copy of the CSV test data, written once per session."""
+    import pandas as pd
+
+    pytest.importorskip("openpyxl")
+    path = tmp_path_factory.mktemp("data") / "test_data_e2e.xlsx"
+    pd.read_csv(test_data_csv).to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture(scope="session")
+def test_data_large_csv(tmp_path_factory):
+    """Path to a CSV with a single column i of 300,000 sequential integers.
+
+    Large enough that DuckDB scans it in parallel and a selective filter yields
+    partly filled result chunks.
+    """
+    import duckdb
+
+    path = tmp_path_factory.mktemp("data") / "large.csv"
+    duckdb.sql(f"COPY (SELECT range AS i FROM range(300000)) TO '{path}' (HEADER)")
+    return path
+
+
+@pytest.fixture(scope="session")
+def invalid_txt(tmp_path_factory):
+    """Path to a file in an unsupported format."""
+    path = tmp_path_factory.mktemp("invalid") / "test.txt"
+    path.write_text("some data")
+    return path
+
+
+@pytest.fixture
+def run_cli(repo_root, monkeypatch, capsys):
+    """Run the CLI in-process and return a CompletedProcess with its output."""
+    monkeypatch.chdir(repo_root)
+    environ = dict(os.environ)
+
+    def run(*args, input=""):
+        monkeypatch.setattr(sys, "argv", ["dtalk", *args])
+        monkeypatch.setattr(sys, "stdin", io.StringIO(input))
+        capsys.readouterr()
+        try:
+            main()
+            returncode = 0
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+        finally:
+            # load_dotenv() writes to os.environ; keep tests isolated
+            os.environ.clear()
+            os.environ.update(environ)
+        out, err = capsys.readouterr()
+        return subprocess.CompletedProcess(["dtalk", *args], returncode, out, err)
+
+    return run
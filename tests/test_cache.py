@@ -0,0 +1,85 @@
+"""Tests for the SQL cache."""
+import io
+
+import duckdb
+import pytest
+from rich.console import Console
+
+from datatalk import cache, query
+from datatalk import main as cli
+from datatalk.cache import SQLCache
+from datatalk.printer import Printer
+
+
+class FakeProvider:
+    """Provider that answers with fixed SQL and counts the calls."""
+
+    model = "test/fake-model"
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.calls = 0
+
+    def to_sql(self, question: str, schema: str) -> str:
+        self.calls += 1
+        return self.sql
+
+
+@pytest.fixture
+def sql_cache(tmp_path):
+    return SQLCache(str(tmp_path / "sql_cache.db"))
+
+
+def ask(provider, sql_cache, con) -> dict:
+    printer = Printer(Console(file=io.StringIO()), quiet=True)
+    return query.process_query(provider, "question", "schema", con, printer, cache=sql_cache)
+
+
+def test_get_returns_stored_sql(sql_cache):
+    assert sql_cache.get("model", "schema", "How many rows?") is None
+    sql_cache.put("model", "schema", "How many rows?", "SELECT COUNT(*) FROM events")
+    assert sql_cache.get("model", "schema", "  How many\trows? ") == "SELECT COUNT(*) FROM events"
+    assert sql_cache.get("model", "schema", "how many rows?") is None
+    assert sql_cache.get("other-model", "schema", "How many rows?") is None
+    assert sql_cache.get("model", "other schema", "How many rows?") is None
+
+
+def test_stored_sql_persists(tmp_path):
+    path = str(tmp_path / "sql_cache.db")
+    SQLCache(path).put("model", "schema", "question", "SELECT 1")
+    assert SQLCache(path).get("model", "schema", "question") == "SELECT 1"
+
+
+def test_cached_sql_skips_the_model(sql_cache):
+    con = duckdb.connect()
+    con.execute("CREATE TABLE events AS SELECT 1 AS id")
+    provider = FakeProvider("SELECT COUNT(*) AS n FROM events")
+
+    assert ask(provider, sql_cache, con)["dataframe"]["n"][0] == 1
+    assert ask(provider, sql_cache, con)["sql"] == provider.sql
+    assert provider.calls == 1
+
+
+def test_unusable_cache_is_disabled(tmp_path, monkeypatch):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setattr(cache, "CACHE_FILE", str(blocker / "sql_cache.db"))
+    assert cli.open_cache() is None
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "INSERT INTO events VALUES (2)",
+        "WITH x AS (SELECT 2 AS id) INSERT INTO events SELECT * FROM x",
+    ],
+)
+def test_only_queries_are_cached(sql_cache, sql):
+    con = duckdb.connect()
+    con.execute("CREATE TABLE events AS SELECT 1 AS id")
+    provider = FakeProvider(sql)
+
+    assert ask(provider, sql_cache, con)["error"] is None
+    assert ask(provider, sql_cache, con)["error"] is None
+    assert provider.calls == 2
+    assert sql_cache.get(provider.model, "schema", "question") is None
@@ -0,0 +1,147 @@
+"""Tests for loading data and executing queries."""
+import os
+import weakref
+
+import duckdb
+import pytest
+
+from datatalk import database
+
+
+@pytest.fixture
+def csv_file(tmp_path, monkeypatch):
+    """A small CSV file, with the load cache in a temporary directory."""
+    monkeypatch.setattr(database, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "data.csv"
+    path.write_text("id,name\n1,a\n2,b\n3,c\n")
+    return path
+
+
+def load(path) -> duckdb.DuckDBPyConnection:
+    con = database.create_connection(str(path))
+    database.load_data(con, str(path))
+    return con
+
+
+def count(con: duckdb.DuckDBPyConnection) -> int:
+    return con.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def test_cached_copy_is_read_only(csv_file):
+    con = load(csv_file)
+    assert database._uses_cache(con)
+    with pytest.raises(duckdb.Error):
+        con.execute("DELETE FROM events")
+    con.close()
+
+    assert count(load(csv_file)) == 3
+
+
+def test_concurrent_sessions_share_the_cache(csv_file):
+    first = load(csv_file)
+    second = load(csv_file)
+    assert database._uses_cache(first) and database._uses_cache(second)
+    assert count(second) == 3
+
+
+def test_reuses_loaded_copy_of_unchanged_file(csv_file, monkeypatch):
+    load(csv_file).close()
+
+    def fail(con, path):
+        raise AssertionError("file was loaded again")
+
+    monkeypatch.setitem(database.LOADERS, ".csv", fail)
+    assert count(load(csv_file)) == 3
+
+
+def test_reloads_file_replaced_by_older_copy(csv_file):
+    stat = csv_file.stat()
+    load(csv_file).close()
+
+    csv_file.write_text("id,name\n1,a\n")
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+
+    assert count(load(csv_file)) == 1
+
+
+def test_unwritable_cache_falls_back_to_memory(csv_file, tmp_path, monkeypatch):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setattr(database, "CACHE_DIR", str(blocker / "cache"))
+
+    con = load(csv_file)
+    assert not database._uses_cache(con)
+    assert count(con) == 3
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM range(100) t(i)",
+        "SELECT * FROM range(100) t(i);",
+        "SELECT * FROM range(100) t(i) ; \n",
+        "SELECT * FROM range(100) t(i) -- all rows",
+        "WITH r AS (SELECT * FROM range(100) t(i)) SELECT * FROM r -- all rows\n",
+        "SELECT * FROM range(100) t(i); -- done",
+        "SELECT 1; SELECT * FROM range(100) t(i)",
+    ],
+)
+def test_execute_query_limits_rows(sql):
+    df = database.execute_query(duckdb.connect(), sql, limit=21)
+    assert len(df) == 21
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM events WHERE i % 997 = 0",
+        "SELECT * FROM events WHERE i % 997 = 0 LIMIT 50",
+    ],
+)
+def test_execute_query_fills_limit_across_chunks(sql):
+    con = duckdb.connect()
+    con.execute("CREATE TABLE events AS SELECT range AS i FROM range(3000000)")
+    df = database.execute_query(con, sql, limit=21)
+    assert df["i"].tolist() == [i * 997 for i in range(21)]
+
+
+@pytest.mark.parametrize(
+    "sql, read_only",
+    [
+        ("SELECT 1", True),
+        ("-- count\nSELECT 1", True),
+        ("WITH x AS (SELECT 1) SELECT * FROM x", True),
+        ("FROM range(3)", True),
+        ("WITH x AS (SELECT 1) INSERT INTO events SELECT * FROM x", False),
+        ("DELETE FROM events", False),
+        ("SELECT 1; DELETE FROM events", False),
+        ("SELEC 1", False),
+    ],
+)
+def test_is_read_only(sql, read_only):
+    assert database.is_read_only(duckdb.connect(), sql) is read_only
+
+
+def test_execute_query_runs_writes_unwrapped():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE events AS SELECT 1 AS id")
+    database.execute_query(con, "WITH x AS (SELECT 2 AS id) INSERT INTO events SELECT * FROM x", limit=21)
+    assert con.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 2
+
+
+def test_memoized_results_reset_after_statement():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE events AS SELECT * FROM range(3)")
+    sql = "SELECT COUNT(*) AS n FROM events"
+
+    assert database.execute_query(con, sql, memoize=True)["n"][0] == 3
+    database.execute_query(con, "DELETE FROM events", memoize=True)
+    assert database.execute_query(con, sql, memoize=True)["n"][0] == 0
+
+
+def test_memoized_results_do_not_keep_connection_alive():
+    con = duckdb.connect()
+    database.execute_query(con, "SELECT 1", memoize=True)
+    ref = weakref.ref(con)
+    del con
+    assert ref() is None
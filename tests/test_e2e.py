@@ -1,165 +1,90 @@
 """
 E2E tests for DataTalk CLI.
 
-These tests are provider-agnostic and work with any LLM provider configured
-in your environment. Configure your provider by setting the appropriate
-environment variables in a .env file:
-
-OpenAI:
-    LLM_MODEL=gpt-4o
-    OPENAI_API_KEY=your-key
-
-Anthropic:
-    LLM_MODEL=claude-3-5-sonnet-20241022
-    ANTHROPIC_API_KEY=your-key
-
-Google:
-    LLM_MODEL=gemini-1.5-flash
-    GEMINI_API_KEY=your-key
-
-Ollama (local):
-    LLM_MODEL=ollama/llama3.1
-
-The tests will use whatever provider is configured in your .env file.
+The LLM is replaced by a fake that answers every question with fixed SQL
+(see conftest.py), so the tests run offline and exercise the CLI plumbing:
+loading, query execution and output formats.
 """
 import json
-import subprocess
-import sys
-import os
-from pathlib import Path
 import pytest
 
+pytestmark = pytest.mark.integration
+
+# Output that only belongs in interactive mode
+DECORATIONS = ("Data loaded successfully!", "██████")
+# Characters of output quoted in failure messages
+SNIPPET_CHARS = 2048
+# Rows in the test data, which is what the default fake SQL counts
+ROW_COUNT = 5
+COUNT_SQL = "SELECT COUNT(*) FROM events"
+COUNT_OUTPUT = f"count_star()\n{ROW_COUNT}\n"
+
+# Data fixture, prompt, fake SQL, extra flags, extra forbidden output and expected
+# (tab-separated) output per case; prompts are unique since SQL is cached per question
+NON_INTERACTIVE_CASES = [
+    pytest.param(
+        "test_data_csv", "How many products are there?", COUNT_SQL, [], ["Question"], COUNT_OUTPUT,
+        id="csv",
+    ),
+    pytest.param(
+        "test_data_parquet", "Count the products in Parquet", COUNT_SQL, [], [], COUNT_OUTPUT,
+        id="parquet",
+    ),
+    pytest.param(
+        "test_data_excel", "Count the products in Excel", COUNT_SQL, [], [], COUNT_OUTPUT,
+        id="excel",
+    ),
+    pytest.param(
+        "test_data_csv",
+        "What is the total quantity?",
+        "SELECT SUM(quantity) AS total FROM events",
+        [],
+        [],
+        "total\n350.0\n",
+        id="aggregation",
+    ),
+    pytest.param(
+        "test_data_csv",
+        "Show me products in the Electronics category",
+        "SELECT id, name FROM events WHERE category = 'Electronics' ORDER BY id",
+        [],
+        [],
+        "id\tname\n1\tLaptop\n2\tSmartphone\n",
+        id="filtering",
+    ),
+    pytest.param(
+        "test_data_csv", "How many rows are there?", COUNT_SQL, ["--no-schema"],
+        ["Dataset Statistics"], COUNT_OUTPUT,
+        id="no_schema",
+    ),
+]
+
+
+def assert_success(result) -> None:
+    """Fail with the CLI's output if it did not exit cleanly."""
+    assert result.returncode == 0, (
+        f"Command failed with stderr: {result.stderr}\n"
+        f"Output was:\n{result.stdout[:SNIPPET_CHARS]}"
+    )
+
+
+def assert_no_decorations(stdout: str, *extra: str) -> None:
+    """Fail if stdout contains interactive-only output."""
+    found = [marker for marker in (*DECORATIONS, *extra) if marker in stdout]
+    assert not found, f"Unexpected interactive output {found} in:\n{stdout[:SNIPPET_CHARS]}"
+
 
 class TestSuite:
     """E2E tests for DataTalk CLI."""
 
-    @pytest.fixture
-    def test_data_csv(self):
-        """Path to CSV test data file."""
-        return Path(__file__).parent / "test_data_e2e.csv"
-
-    @pytest.fixture
-    def test_data_parquet(self):
-        """Path to Parquet test data file."""
-        return Path(__file__).parent / "test_data_e2e.parquet"
-
-    @pytest.fixture
-    def test_data_excel(self):
-        """Path to Excel test data file."""
-        return Path(__file__).parent / "test_data_e2e.xlsx"
-
     # ==================== FILE LOADING ====================
 
-    def test_load_csv_file(self, test_data_csv):
-        """Load CSV and process basic query in non-interactive mode."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
-            str(test_data_csv),
-            "--prompt",
-            "How many products are there?",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-
-        # Should complete without crashing (API might fail but app handles it)
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
-
-        # In non-interactive mode, should NOT show decorative output
-        assert "Data loaded successfully!" not in result.stdout
-        assert "██████" not in result.stdout  # No banner
-        # Should not enter interactive mode
-        assert "Question" not in result.stdout
-
-    def test_load_parquet_file(self, test_data_parquet):
-        """Load Parquet file in non-interactive mode."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
-            str(test_data_parquet),
-            "--prompt",
-            "Show me all products",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-
-        # Should complete without crashing
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
-
-        # In non-interactive mode, should NOT show decorative output
-        assert "Data loaded successfully!" not in result.stdout
-        assert "██████" not in result.stdout  # No banner
-
-    def test_load_excel_file(self, test_data_excel):
-        """Load Excel file in non-interactive mode."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
-            str(test_data_excel),
-            "--prompt",
-            "Count the products",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-
-        # Should complete without crashing
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
-
-        # In non-interactive mode, should NOT show decorative output
-        assert "Data loaded successfully!" not in result.stdout
-        assert "██████" not in result.stdout  # No banner
-
-    def test_load_invalid_format_fails(self, tmp_path):
+    def test_load_invalid_format_fails(self, invalid_txt, run_cli):
         """Reject unsupported file format."""
-        # Create a temporary .txt file
-        invalid_file = tmp_path / "test.txt"
-        invalid_file.write_text("some data")
-
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
-            str(invalid_file),
+        result = run_cli(
+            str(invalid_txt),
             "--prompt",
             "test query",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
         )
 
         # Should fail gracefully
@@ -167,23 +92,12 @@ class TestSuite:
         # Should show error about unsupported format
         assert "Error" in result.stdout or len(result.stderr) > 0
 
-    def test_load_missing_file_fails(self):
+    def test_load_missing_file_fails(self, run_cli):
         """Handle missing file gracefully."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
+        result = run_cli(
             "nonexistent_file.csv",
             "--prompt",
             "test query",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
         )
 
         # Should fail gracefully, not crash
@@ -192,311 +106,134 @@ class TestSuite:
 
     # ==================== OUTPUT FORMATS ====================
 
-    def test_output_sql_shown(self, test_data_csv):
+    def test_output_sql_shown(self, test_data_csv, run_cli, fake_llm):
         """Show SQL with --sql flag."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
+        result = run_cli(
             str(test_data_csv),
             "--prompt",
             "Show me all products",
             "--sql",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
         )
 
-        # Should complete without crashing even if API fails
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
-
-        # If API key is valid and call succeeds, SQL should be shown
-        # If API fails, we should see an error but app shouldn't crash
-        if result.returncode == 0:
-            # API call succeeded - SQL output should contain SQL keywords
-            # The --sql flag outputs raw SQL without "SQL:" prefix
-            assert "SELECT" in result.stdout.upper() or "SQL:" in result.stdout
-        else:
-            # API call may have failed, but app handled it gracefully
-            # Error messages may appear in stdout or stderr
-            combined_output = result.stdout.lower() + result.stderr.lower()
-            assert "error" in combined_output
-
-    def test_output_json(self, test_data_csv):
+        assert_success(result)
+
+        assert fake_llm.sql in result.stdout
+
+    def test_output_json(self, test_data_csv, run_cli, fake_llm):
         """JSON output with --json flag should be pure JSON, parseable by scripts."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
+        result = run_cli(
             str(test_data_csv),
             "--prompt",
             "Count all products",
             "--json",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
         )
 
-        # Should complete (might fail if API key invalid, but shouldn't crash)
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
-
-        # If succeeded, stdout should be ONLY valid JSON (nothing else)
-        if result.returncode == 0:
-            try:
-                # The entire stdout should parse as JSON
-                data = json.loads(result.stdout)
-                # Should have expected structure
-                assert "sql" in data, "JSON output missing 'sql' field"
-                assert "data" in data, "JSON output missing 'data' field"
-                assert "error" in data, "JSON output missing 'error' field"
-                # Error should be null on success
-                assert data["error"] is None, f"Unexpected error in output: {data['error']}"
-            except json.JSONDecodeError as e:
-                pytest.fail(
-                    f"Output is not pure JSON (not parseable for scripting).\n"
-                    f"Error: {e}\n"
-                    f"Output was:\n{result.stdout}"
-                )
-
-    def test_output_csv(self, test_data_csv):
+        assert_success(result)
+
+        # stdout should be ONLY valid JSON (nothing else)
+        try:
+            # The entire stdout should parse as JSON
+            data = json.loads(result.stdout)
+        except json.JSONDecodeError as e:
+            pytest.fail(
+                f"Output is not pure JSON (not parseable for scripting).\n"
+                f"Error: {e}\n"
+                f"Output was:\n{result.stdout[:SNIPPET_CHARS]}"
+            )
+        # Should have expected structure
+        assert "sql" in data, "JSON output missing 'sql' field"
+        assert "data" in data, "JSON output missing 'data' field"
+        assert "error" in data, "JSON output missing 'error' field"
+        # Error should be null on success
+        assert data["error"] is None, f"Unexpected error in output: {data['error']}"
+        assert data["sql"] == fake_llm.sql
+        assert data["data"] == [{"count_star()": ROW_COUNT}]
+
+    def test_output_csv(self, test_data_csv, run_cli):
         """CSV output with --csv flag should be pure CSV, parseable by scripts."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
+        result = run_cli(
             str(test_data_csv),
             "--prompt",
             "Select all products",
             "--csv",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
         )
 
-        # Should complete
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
-
-        # If succeeded, stdout should be ONLY valid CSV (nothing else)
-        if result.returncode == 0:
-            import csv
-            import io
-            
-            try:
-                # The entire stdout should be parseable as CSV
-                reader = csv.reader(io.StringIO(result.stdout))
-                rows = list(reader)
-                
-                # Should have at least a header row
-                assert len(rows) > 0, "CSV output is empty"
-                
-                # First row should be header with column names
-                header = rows[0]
-                assert len(header) > 0, "CSV header is empty"
-                
-                # If there are data rows, they should have same number of columns as header
-                if len(rows) > 1:
-                    for i, row in enumerate(rows[1:], start=1):
-                        assert len(row) == len(header), (
-                            f"Row {i} has {len(row)} columns, but header has {len(header)}"
-                        )
-            except Exception as e:
-                pytest.fail(
-                    f"Output is not pure CSV (not parseable for scripting).\n"
-                    f"Error: {e}\n"
-                    f"Output was:\n{result.stdout}"
-                )
-
-    def test_output_sql_only(self, test_data_csv):
+        assert_success(result)
+
+        # stdout should be ONLY valid CSV (nothing else)
+        import csv
+        import io
+
+        try:
+            # The entire stdout should be parseable as CSV
+            reader = csv.reader(io.StringIO(result.stdout))
+            rows = list(reader)
+        except csv.Error as e:
+            pytest.fail(
+                f"Output is not pure CSV (not parseable for scripting).\n"
+                f"Error: {e}\n"
+                f"Output was:\n{result.stdout[:SNIPPET_CHARS]}"
+            )
+
+        # Should have at least a header row
+        assert len(rows) > 0, "CSV output is empty"
+
+        # First row should be header with column names
+        header = rows[0]
+        assert len(header) > 0, "CSV header is empty"
+
+        # Data rows should have same number of columns as header
+        for i, row in enumerate(rows[1:], start=1):
+            assert len(row) == len(header), (
+                f"Row {i} has {len(row)} columns, but header has {len(header)}"
+            )
+        assert rows == [["count_star()"], [str(ROW_COUNT)]]
+
+    def test_output_sql_only(self, test_data_csv, run_cli, fake_llm):
         """Show only SQL with --sql-only flag."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
+        result = run_cli(
             str(test_data_csv),
             "--prompt",
             "Get all products",
             "--sql-only",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-
-        # Should complete
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
-
-        # If succeeded, should show SQL but not execute
-        if result.returncode == 0 and "SQL:" in result.stdout:
-            # SQL should be shown
-            assert "SQL:" in result.stdout
-            # But results table should not be shown (--sql-only means no execution output)
-            # The app shows data loading, but not the query results
-
-    # ==================== DISPLAY OPTIONS ====================
-
-    def test_flag_no_schema(self, test_data_csv):
-        """--no-schema flag in non-interactive mode (already suppressed)."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
-            str(test_data_csv),
-            "--prompt",
-            "Show me the data",
-            "--no-schema",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
         )
 
-        # Should complete without crashing
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
+        assert_success(result)
 
-        # In non-interactive mode, decorative output is already suppressed
-        assert "Data loaded successfully!" not in result.stdout
-        assert "Dataset Statistics" not in result.stdout
+        # SQL should be shown, but not the query results
+        assert result.stdout.strip() == fake_llm.sql
 
     # ==================== QUERY PROCESSING ====================
 
-    def test_query_select_all(self, test_data_csv):
-        """Process SELECT * query in non-interactive mode."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
-            str(test_data_csv),
-            "--prompt",
-            "Show me all the data",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+    @pytest.mark.parametrize("data, prompt, sql, flags, extra, output", NON_INTERACTIVE_CASES)
+    def test_query_non_interactive(
+        self, request, run_cli, fake_llm, data, prompt, sql, flags, extra, output
+    ):
+        """Load a file and process a query in non-interactive mode without decorative output."""
+        fake_llm.sql = sql
+        result = run_cli(str(request.getfixturevalue(data)), "--prompt", prompt, *flags)
 
-        # Should complete
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
-
-        # In non-interactive mode, should NOT show decorative output
-        assert "Data loaded successfully!" not in result.stdout
-        assert "██████" not in result.stdout
-
-    def test_query_aggregation(self, test_data_csv):
-        """Process COUNT/SUM/AVG query in non-interactive mode."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
-            str(test_data_csv),
-            "--prompt",
-            "What is the total quantity?",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+        assert_success(result)
 
-        # Should complete
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
-
-        # In non-interactive mode, should NOT show decorative output
-        assert "Data loaded successfully!" not in result.stdout
-        assert "██████" not in result.stdout
-
-    def test_query_filtering(self, test_data_csv):
-        """Process WHERE clause query in non-interactive mode."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
-            str(test_data_csv),
-            "--prompt",
-            "Show me products in the Electronics category",
-        ]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+        assert output in result.stdout
+        # No banner, statistics or interactive prompt
+        assert_no_decorations(result.stdout, *extra)
+
+    def test_query_truncated_results(self, test_data_large_csv, run_cli, fake_llm):
+        """Show the first rows of a large filtered result, with the footer on stderr."""
+        fake_llm.sql = "SELECT i FROM events WHERE i % 997 = 0"
+        result = run_cli(str(test_data_large_csv), "--prompt", "List every 997th number", "--no-sql")
 
-        # Should complete
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
+        assert_success(result)
 
-        # In non-interactive mode, should NOT show decorative output
-        assert "Data loaded successfully!" not in result.stdout
-        assert "██████" not in result.stdout
+        assert result.stdout.splitlines() == ["i", *(str(i * 997) for i in range(20))]
+        assert "Showing first 20 rows" in result.stderr
 
     # ==================== ERROR HANDLING ====================
 
-    def test_error_no_file_shows_help(self):
+    def test_error_no_file_shows_help(self, run_cli):
         """Show help when no file provided."""
-        cmd = [sys.executable, "-m", "datatalk.main"]
-
-        result = subprocess.run(
-            cmd,
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
+        result = run_cli()
 
         assert result.returncode != 0
         # Should show helpful message about needing a file
@@ -504,33 +241,20 @@ class TestSuite:
 
     # ==================== INTERACTIVE MODE ====================
 
-    def test_interactive_mode(self, test_data_csv):
+    @pytest.mark.timeout(30)
+    def test_interactive_mode(self, test_data_csv, run_cli):
         """Interactive mode processes query and exits gracefully."""
-        cmd = [
-            sys.executable,
-            "-m",
-            "datatalk.main",
+        result = run_cli(
             str(test_data_csv),
-        ]
-
-        result = subprocess.run(
-            cmd,
             input="How many rows?\nquit\n",
-            cwd=Path(__file__).parent.parent,
-            capture_output=True,
-            text=True,
-            timeout=30,
         )
 
-        # Should complete (may fail if API key invalid, but shouldn't crash)
-        assert result.returncode in [
-            0,
-            1,
-        ], f"Command failed unexpectedly with stderr: {result.stderr}"
+        assert_success(result)
 
         # Should show interactive mode elements
         assert "Ask questions about your data" in result.stdout
         assert "██████" in result.stdout  # Banner shown in interactive mode
         assert "Dataset Statistics" in result.stdout
+        assert "count_star()" in result.stdout
         assert "Goodbye" in result.stdout
 
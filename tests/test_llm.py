@@ -0,0 +1,91 @@
+"""Tests for the LiteLLM provider."""
+from types import SimpleNamespace
+
+import litellm
+import pytest
+
+from datatalk.llm import LOCAL_REQUEST_TIMEOUT, REQUEST_TIMEOUT, LiteLLMProvider
+
+
+def test_providers_share_one_client():
+    LiteLLMProvider("test/model")
+    client = litellm.client_session
+    LiteLLMProvider("test/model")
+    assert litellm.client_session is client
+
+
+class FakeStream:
+    """Streamed response yielding the given content pieces; records how many were read."""
+
+    def __init__(self, *pieces: str):
+        self.pieces = pieces
+        self.read = 0
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.read += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+@pytest.mark.parametrize(
+    "content, end",
+    [
+        ("```sql\nSELECT 1\n", None),
+        ("```sql\nSELECT 1\n```", 19),
+        ("SELECT 1", None),
+        ("SELECT 1;", 9),
+        ("SELECT ';", None),
+        ("SELECT ';';", 11),
+        ('SELECT "a;', None),
+        ("Sure; here is the query:", None),
+        ("```sql\n-- count rows; simple\n", None),
+        ("SELECT 1; -- note", 9),
+    ],
+)
+def test_statement_end(content, end):
+    assert LiteLLMProvider("test/model")._statement_end(content) == end
+
+
+@pytest.mark.parametrize(
+    "pieces, sql",
+    [
+        (["Sure; here is the query:\n```sql\n", "SELECT a FROM events\n```"], "SELECT a FROM events"),
+        (["```sql\n-- count rows; simple\n", "SELECT COUNT(*) FROM events;\n```"],
+         "-- count rows; simple\nSELECT COUNT(*) FROM events;"),
+        (["SELECT a FROM events", "; -- note"], "SELECT a FROM events;"),
+    ],
+)
+def test_read_stream_ignores_prose_and_comments(pieces, sql):
+    provider = LiteLLMProvider("test/model")
+    assert provider._clean_sql(provider._read_stream(FakeStream(*pieces))) == sql
+
+
+def test_read_stream_stops_at_end_of_statement():
+    stream = FakeStream("SELECT 1", ";", "\nignored", None)
+    assert LiteLLMProvider("test/model")._read_stream(stream) == "SELECT 1;"
+    assert stream.read == 2
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "SELECT 1",
+        "```sql\nSELECT 1\n```",
+        "```SQL \nSELECT 1\n```",
+        "```duckdb-sql\nSELECT 1\n```",
+        "```sql\r\nSELECT 1\r\n```",
+        "```\nSELECT 1\n```",
+        "Here you go:\n```sql\nSELECT 1\n```\nDone.",
+        "```sql\nSELECT 1",
+    ],
+)
+def test_clean_sql(content):
+    assert LiteLLMProvider("test/model")._clean_sql(content) == "SELECT 1"
+
+
+def test_timeout_defaults_and_override(monkeypatch):
+    monkeypatch.delenv("MODEL_TIMEOUT", raising=False)
+    assert LiteLLMProvider("gpt-4o")._timeout == REQUEST_TIMEOUT
+    assert LiteLLMProvider("ollama/llama3.1")._timeout == LOCAL_REQUEST_TIMEOUT
+    monkeypatch.setenv("MODEL_TIMEOUT", "120")
+    assert LiteLLMProvider("ollama/llama3.1")._timeout == 120.0
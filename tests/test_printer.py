@@ -0,0 +1,29 @@
+"""Tests for result rendering."""
+import io
+
+import duckdb
+from rich.console import Console
+
+from datatalk.printer import Printer, print_query_results
+
+
+def render(sql: str, quiet: bool = False) -> str:
+    """Render the result of sql and return the console output."""
+    out = io.StringIO()
+    printer = Printer(Console(file=out, width=200), quiet=quiet)
+    print_query_results(duckdb.sql(sql).df(), printer)
+    return out.getvalue()
+
+
+def test_table_renders_nested_and_null_cells():
+    output = render("SELECT [1, 2] AS l, {'a': 1} AS s, NULL::INTEGER AS n, 'x' AS t")
+    assert "[1 2]" in output
+    assert "{'a': 1}" in output
+    assert "<NA>" not in output
+    assert "nan" not in output
+
+
+def test_piped_output_is_tsv_with_footer_on_stderr(capsys):
+    output = render("SELECT i, 'x' AS t FROM range(30) r(i)", quiet=True)
+    assert output.splitlines() == ["i\tt", *(f"{i}\tx" for i in range(20))]
+    assert "Showing first 20 rows" in capsys.readouterr().err